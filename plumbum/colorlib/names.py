@@ -380,8 +380,8 @@ class FindNearest:
         return (self.r - rgb[0]) ** 2 + (self.g - rgb[1]) ** 2 + (self.b - rgb[2]) ** 2
 
     def _distance_to_color_number(self, n: int) -> int:
-        color = color_html[n]
-        return self._distance_to_color(color)
+        r, g, b = color_rgb[n]
+        return (self.r - r) ** 2 + (self.g - g) ** 2 + (self.b - b) ** 2
 
     def only_colorblock(self) -> int:
         """This finds the nearest color based on block system, only works
@@ -424,6 +424,10 @@ def from_html(color: str) -> tuple[int, int, int]:
     return (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16))
 
 
+color_rgb = tuple(from_html(color) for color in color_html)
+"""The ``color_html`` table, already converted to rgb tuples."""
+
+
 def to_html(r, g, b):
     """Convert rgb to html hex code."""
     return f"#{r:02x}{g:02x}{b:02x}"
@@ -22,8 +22,8 @@ from .names import (
     FindNearest,
     attributes_ansi,
     color_codes_simple,
-    color_html,
     color_names,
+    color_rgb,
     from_html,
 )
 
@@ -179,7 +179,7 @@ class Color:
             self.number = number
 
         self.isreset = False
-        self.exact = self.rgb == from_html(color_html[self.number])
+        self.exact = self.rgb == color_rgb[self.number]
         if not self.exact:
             self.number = number
 
@@ -201,11 +201,11 @@ class Color:
 
         if color in _lower_camel_names[:16]:
             self.number = _lower_camel_names.index(color)
-            self.rgb = from_html(color_html[self.number])
+            self.rgb = color_rgb[self.number]
 
         elif isinstance(color, int) and 0 <= color < 16:
             self.number = color
-            self.rgb = from_html(color_html[color])
+            self.rgb = color_rgb[color]
 
         else:
             raise ColorNotFound("Did not find color: " + repr(color))
@@ -231,11 +231,11 @@ class Color:
 
         if color in _lower_camel_names:
             self.number = _lower_camel_names.index(color)
-            self.rgb = from_html(color_html[self.number])
+            self.rgb = color_rgb[self.number]
 
         elif isinstance(color, int) and 0 <= color <= 255:
             self.number = color
-            self.rgb = from_html(color_html[color])
+            self.rgb = color_rgb[color]
 
         else:
             raise ColorNotFound("Did not find color: " + repr(color))
@@ -506,7 +506,9 @@ class Style(metaclass=ABCMeta):
         sep = kargs.get("sep", " ")
         file = kargs.get("file", self.stdout)
         flush = kargs.get("flush", False)
-        file.write(self.wrap(sep.join(map(str, printables))) + end)
+        file.write(
+            "".join((str(self), sep.join(map(str, printables)), str(~self), end))
+        )
         if flush:
             file.flush()
 
@@ -750,28 +752,35 @@ class HTMLStyle(Style):
         "ol": "ol start=0",
         "strikeout": "s",
     }
+    _attribute_order: ClassVar[tuple[str, ...]] = tuple(sorted(attribute_names))
     end = "<br/>\n"
 
     def __str__(self):
         if self.isreset:
             raise ResetNotSupported("HTML does not support global resets!")
 
-        result = ""
+        parts = []
 
         if self.bg and not self.bg.isreset:
-            result += f'<span style="background-color: {self.bg.hex_code}">'
+            parts.append(f'<span style="background-color: {self.bg.hex_code}">')
         if self.fg and not self.fg.isreset:
-            result += f'<font color="{self.fg.hex_code}">'
-        for attr in sorted(self.attributes):
-            if self.attributes[attr]:
-                result += "<" + self.attribute_names[attr] + ">"
-
-        for attr in sorted(self.attributes, reverse=True):
-            if not self.attributes[attr]:
-                result += "</" + self.attribute_names[attr].split(" ")[0] + ">"
+            parts.append(f'<font color="{self.fg.hex_code}">')
+
+        attributes = self.attributes
+        closed = []
+        for attr in self._attribute_order:
+            if attr not in attributes:
+                continue
+            if attributes[attr]:
+                parts.append("<" + self.attribute_names[attr] + ">")
+            else:
+                closed.append(attr)
+
+        for attr in reversed(closed):
+            parts.append("</" + self.attribute_names[attr].split(" ")[0] + ">")
         if self.fg and self.fg.isreset:
-            result += "</font>"
+            parts.append("</font>")
         if self.bg and self.bg.isreset:
-            result += "</span>"
+            parts.append("</span>")
 
-        return result
+        return "".join(parts)
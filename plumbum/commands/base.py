@@ -1,16 +1,18 @@
 from __future__ import annotations
 
 import contextlib
-import functools
-import shlex
+import os
+import re
 import subprocess
-from subprocess import PIPE, Popen
+import weakref
+from subprocess import DEVNULL, PIPE
 from tempfile import TemporaryFile
 from types import MethodType
 from typing import ClassVar
 
 import plumbum.commands.modifiers
 from plumbum.commands.processes import iter_lines, run_proc
+from plumbum.lib import IS_WIN32, _lazy_import
 
 __all__ = (
     "iter_lines",
@@ -41,19 +43,68 @@ class RedirectionError(Exception):
 # ===================================================================================================
 # Utilities
 # ===================================================================================================
-# modified from the stdlib pipes module for windows
-_safechars = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@%_-+=:,./"
-_funnychars = '"`$\\'
+# the same set of characters ``shlex.quote`` leaves unquoted
+_find_unsafe = re.compile(r"[^\w@%+=:,./-]", re.ASCII).search
 
 
 def shquote(text):
     """Quotes the given text with shell escaping (assumes as syntax similar to ``sh``)"""
-    text = str(text)
-    return shlex.quote(text)
+    if type(text) is not str:
+        text = str(text)
+    if not text:
+        return "''"
+    if _find_unsafe(text) is None:
+        return text
+    # use single quotes, and put single quotes into double quotes
+    return "'" + text.replace("'", "'\"'\"'") + "'"
 
 
 def shquote_list(seq):
-    return [shquote(item) for item in seq]
+    return list(map(shquote, seq))
+
+
+def _close_streams(proc):
+    for f in (proc.stdin, proc.stdout, proc.stderr):
+        # usually communicate() has closed them already, or they were never
+        # piped; don't pay for a failing/no-op close() in that case
+        if f is None or getattr(f, "closed", False):
+            continue
+        with contextlib.suppress(Exception):
+            f.close()
+
+
+class _BgRunner:
+    """The ``run()`` method that :func:`bgrun <BaseCommand.bgrun>` adds to its process;
+    it only runs the process once"""
+
+    __slots__ = ("_proc", "retcode", "timeout", "done")
+
+    def __init__(self, proc, retcode, timeout):
+        # a weak reference, so that the process and its run() don't form a cycle
+        self._proc = weakref.ref(proc)
+        self.retcode = retcode
+        self.timeout = timeout
+        self.done = False
+
+    def __call__(self):
+        if self.done:
+            return None
+        self.done = True
+        proc = self._proc()
+        try:
+            return run_proc(proc, self.retcode, self.timeout)
+        finally:
+            _close_streams(proc)
+
+
+class _ImplicitDevnull(int):
+    """``subprocess.DEVNULL``, filled in by plumbum itself rather than by the caller;
+    a redirection may take the place of this one, but not of an explicit ``DEVNULL``"""
+
+    __slots__ = ()
+
+
+_IMPLICIT_DEVNULL = _ImplicitDevnull(DEVNULL)
 
 
 # ===================================================================================================
@@ -62,7 +113,7 @@ def shquote_list(seq):
 class BaseCommand:
     """Base of all command objects"""
 
-    __slots__ = ("cwd", "env", "custom_encoding", "__weakref__")
+    __slots__ = ("__weakref__",)
 
     def __str__(self):
         return " ".join(self.formulate())
@@ -94,20 +145,14 @@ class BaseCommand:
     def __getitem__(self, args):
         """Creates a bound-command with the given arguments. Shortcut for
         bound_command."""
-        if not isinstance(args, (tuple, list)):
-            args = [
-                args,
-            ]
-        return self.bound_command(*args)
+        if isinstance(args, (tuple, list)):
+            return self.bound_command(*args)
+        return self.bound_command(args)
 
     def bound_command(self, *args):
         """Creates a bound-command with the given arguments"""
         if not args:
             return self
-
-        if isinstance(self, BoundCommand):
-            return BoundCommand(self.cmd, self.args + list(args))
-
         return BoundCommand(self, args)
 
     def __call__(self, *args, **kwargs):
@@ -207,21 +252,7 @@ class BaseCommand:
         retcode = kwargs.pop("retcode", 0)
         timeout = kwargs.pop("timeout", None)
         p = self.popen(args, **kwargs)
-        was_run = [False]
-
-        def runner():
-            if was_run[0]:
-                return None  # already done
-            was_run[0] = True
-            try:
-                return run_proc(p, retcode, timeout)
-            finally:
-                del p.run  # to break cyclic reference p -> cell -> p
-                for f in (p.stdin, p.stdout, p.stderr):
-                    with contextlib.suppress(Exception):
-                        f.close()
-
-        p.run = runner
+        p.run = runner = _BgRunner(p, retcode, timeout)
         yield p
         runner()
 
@@ -250,8 +281,14 @@ class BaseCommand:
 
         :returns: A tuple of (return code, stdout, stderr)
         """
-        with self.bgrun(args, **kwargs) as p:
-            return p.run()
+        # what bgrun() does, without setting up a context manager and a runner closure
+        retcode = kwargs.pop("retcode", 0)
+        timeout = kwargs.pop("timeout", None)
+        p = self.popen(args, **kwargs)
+        try:
+            return run_proc(p, retcode, timeout)
+        finally:
+            _close_streams(p)
 
     def _use_modifier(self, modifier, args):
         """
@@ -306,21 +343,56 @@ class BaseCommand:
         return self._use_modifier(plumbum.commands.modifiers.NOHUP, kwargs)
 
 
+def _formulates_constantly(cmd):
+    """Whether ``cmd.formulate(level)`` always returns the same thing for a given level"""
+    return (
+        isinstance(cmd, ConcreteCommand)
+        or getattr(cmd, "_formulate_cache", None) is not None
+    )
+
+
 class BoundCommand(BaseCommand):
-    __slots__ = ("cmd", "args")
+    __slots__ = ("cmd", "args", "_formulate_cache")
 
     def __init__(self, cmd, args):
         self.cmd = cmd
-        self.args = list(args)
+        # plain arguments are stringified once here, rather than on every formulation;
+        # None, nested argument lists and commands are left for formulate() to expand
+        self.args = tuple(
+            a
+            if a is None or type(a) is str or isinstance(a, (BaseCommand, list, tuple))
+            else str(a)
+            for a in args
+        )
+        # a constant command bound to plain strings always formulates the same way,
+        # so remember the result per level; anything else may change between calls
+        self._formulate_cache = (
+            {}
+            if _formulates_constantly(cmd)
+            and all(a is None or type(a) is str for a in self.args)
+            else None
+        )
 
     def __repr__(self):
         return f"BoundCommand({self.cmd!r}, {self.args!r})"
 
+    def bound_command(self, *args):
+        # bind to the underlying command directly, rather than nesting bound commands
+        if not args:
+            return self
+        return BoundCommand(self.cmd, (*self.args, *args))
+
     def _get_encoding(self):
         return self.cmd._get_encoding()
 
     def formulate(self, level=0, args=()):
-        return self.cmd.formulate(level + 1, self.args + list(args))
+        cache = self._formulate_cache
+        if args or cache is None:
+            return self.cmd.formulate(level + 1, (*self.args, *args))
+        argv = cache.get(level)
+        if argv is None:
+            argv = cache[level] = tuple(self.cmd.formulate(level + 1, self.args))
+        return list(argv)
 
     @property
     def machine(self):
@@ -328,14 +400,14 @@ class BoundCommand(BaseCommand):
 
     def popen(self, args=(), **kwargs):
         if isinstance(args, str):
-            args = [
-                args,
-            ]
-        return self.cmd.popen(self.args + list(args), **kwargs)
+            return self.cmd.popen((*self.args, args), **kwargs)
+        if not args:
+            return self.cmd.popen(self.args, **kwargs)
+        return self.cmd.popen((*self.args, *args), **kwargs)
 
 
 class BoundEnvCommand(BaseCommand):
-    __slots__ = ("cmd",)
+    __slots__ = ("cmd", "env", "cwd")
 
     def __init__(self, cmd, env=None, cwd=None):
         self.cmd = cmd
@@ -356,21 +428,27 @@ class BoundEnvCommand(BaseCommand):
         return self.cmd.machine
 
     def popen(self, args=(), cwd=None, env=None, **kwargs):
-        env = env or {}
+        # the machines only read the env mapping (merging it into a fresh dict), so
+        # the bound one can be passed on as is unless there's something to add to it
         return self.cmd.popen(
             args,
             cwd=self.cwd if cwd is None else cwd,
-            env=dict(self.env, **env),
+            env={**self.env, **env} if env else self.env,
             **kwargs,
         )
 
 
 class Pipeline(BaseCommand):
-    __slots__ = ("srccmd", "dstcmd")
+    __slots__ = ("srccmd", "dstcmd", "_formulate_cache")
 
     def __init__(self, srccmd, dstcmd):
         self.srccmd = srccmd
         self.dstcmd = dstcmd
+        self._formulate_cache = (
+            {}
+            if _formulates_constantly(srccmd) and _formulates_constantly(dstcmd)
+            else None
+        )
 
     def __repr__(self):
         return f"Pipeline({self.srccmd!r}, {self.dstcmd!r})"
@@ -379,35 +457,42 @@ class Pipeline(BaseCommand):
         return self.srccmd._get_encoding() or self.dstcmd._get_encoding()
 
     def formulate(self, level=0, args=()):
-        return [
-            *self.srccmd.formulate(level + 1),
-            "|",
-            *self.dstcmd.formulate(level + 1, args),
-        ]
+        cache = self._formulate_cache
+        if args or cache is None:
+            return [
+                *self.srccmd.formulate(level + 1),
+                "|",
+                *self.dstcmd.formulate(level + 1, args),
+            ]
+        argv = cache.get(level)
+        if argv is None:
+            argv = cache[level] = (
+                *self.srccmd.formulate(level + 1),
+                "|",
+                *self.dstcmd.formulate(level + 1),
+            )
+        return list(argv)
 
     @property
     def machine(self):
         return self.srccmd.machine
 
     def popen(self, args=(), **kwargs):
-        src_kwargs = kwargs.copy()
-        src_kwargs["stdout"] = PIPE
-        if "stdin" in kwargs:
-            src_kwargs["stdin"] = kwargs["stdin"]
-
-        srcproc = self.srccmd.popen(args, **src_kwargs)
+        # unless a stdin was asked for, don't create a pipe for the first command only
+        # to close it right away; /dev/null gives it the same immediate EOF
+        stdin = kwargs.get("stdin", _IMPLICIT_DEVNULL)
+        srcproc = self.srccmd.popen(args, **{**kwargs, "stdin": stdin, "stdout": PIPE})
         kwargs["stdin"] = srcproc.stdout
         dstproc = self.dstcmd.popen(**kwargs)
         # allow p1 to receive a SIGPIPE if p2 exits
         srcproc.stdout.close()
-        if srcproc.stdin and src_kwargs.get("stdin") != PIPE:
+        if srcproc.stdin is not None and stdin != PIPE:
             srcproc.stdin.close()
         dstproc.srcproc = srcproc
 
         # monkey-patch .wait() to wait on srcproc as well (it's expected to die when dstproc dies)
         dstproc_wait = dstproc.wait
 
-        @functools.wraps(Popen.wait)
         def wait2(*args, **kwargs):
             rc_dst = dstproc_wait(*args, **kwargs)
             rc_src = srcproc.wait(*args, **kwargs)
@@ -426,7 +511,15 @@ class Pipeline(BaseCommand):
             except TypeError:
                 # no-retcode-verification acts "greedily"
                 or_retcode = None if retcode is None else [0, retcode]
-            proc.srcproc.verify(or_retcode, timeout, stdout, stderr)
+            # report a failing earlier command with its own error output, if it was read
+            src_stderr = getattr(proc.srcproc, "_stderr_data", None)
+            if src_stderr is not None:
+                encoding = getattr(proc.srcproc, "custom_encoding", None)
+                if encoding:
+                    src_stderr = src_stderr.decode(encoding, "ignore")
+                proc.srcproc.verify(or_retcode, timeout, stdout, src_stderr)
+            else:
+                proc.srcproc.verify(or_retcode, timeout, stdout, stderr)
             dstproc_verify(retcode, timeout, stdout, stderr)
 
         dstproc.verify = MethodType(verify, dstproc)
@@ -435,8 +528,25 @@ class Pipeline(BaseCommand):
         return dstproc
 
 
+def _path_types():
+    return (
+        _lazy_import("plumbum.machines.local", "LocalPath"),
+        _lazy_import("plumbum.machines.remote", "RemotePath"),
+    )
+
+
+# os.open() flags matching the open() mode of a redirection; the file is only handed
+# to the child process, so there is no point in building a Python file object for it
+_REDIRECTION_FLAGS = {
+    "r": os.O_RDONLY,
+    "w": os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+    "a": os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+}
+_REDIRECTION_EXTRA_FLAGS = getattr(os, "O_NOCTTY", 0) | getattr(os, "O_BINARY", 0)
+
+
 class BaseRedirection(BaseCommand):
-    __slots__ = ("cmd", "file")
+    __slots__ = ("cmd", "file", "_formulate_cache")
 
     # These must be defined by subclasses
     SYM: ClassVar[str]  # pylint: disable=declare-non-slot
@@ -446,6 +556,12 @@ class BaseRedirection(BaseCommand):
     def __init__(self, cmd, file):
         self.cmd = cmd
         self.file = file
+        # file names and paths are immutable; an open file object is not
+        self._formulate_cache = (
+            {}
+            if _formulates_constantly(cmd) and isinstance(file, (str, *_path_types()))
+            else None
+        )
 
     def _get_encoding(self):
         return self.cmd._get_encoding()
@@ -454,34 +570,48 @@ class BaseRedirection(BaseCommand):
         return f"{self.__class__.__name__}({self.cmd!r}, {self.file!r})"
 
     def formulate(self, level=0, args=()):
-        return [
-            *self.cmd.formulate(level + 1, args),
-            self.SYM,
-            shquote(getattr(self.file, "name", self.file)),
-        ]
+        cache = self._formulate_cache
+        if args or cache is None:
+            return [
+                *self.cmd.formulate(level + 1, args),
+                self.SYM,
+                shquote(getattr(self.file, "name", self.file)),
+            ]
+        argv = cache.get(level)
+        if argv is None:
+            argv = cache[level] = (
+                *self.cmd.formulate(level + 1),
+                self.SYM,
+                shquote(getattr(self.file, "name", self.file)),
+            )
+        return list(argv)
 
     @property
     def machine(self):
         return self.cmd.machine
 
     def popen(self, args=(), **kwargs):
-        from plumbum.machines.local import LocalPath
-        from plumbum.machines.remote import RemotePath
+        LocalPath, RemotePath = _path_types()
 
-        if self.KWARG in kwargs and kwargs[self.KWARG] not in (PIPE, None):
+        claimed = kwargs.get(self.KWARG)
+        if claimed is not _IMPLICIT_DEVNULL and claimed not in (PIPE, None):
             raise RedirectionError(f"{self.KWARG} is already redirected")
         if isinstance(self.file, RemotePath):
             raise TypeError("Cannot redirect to/from remote paths")
         if isinstance(self.file, (str, LocalPath)):
-            f = kwargs[self.KWARG] = open(str(self.file), self.MODE, encoding="utf-8")
+            fd = kwargs[self.KWARG] = os.open(
+                str(self.file),
+                _REDIRECTION_FLAGS[self.MODE] | _REDIRECTION_EXTRA_FLAGS,
+                0o666,
+            )
         else:
             kwargs[self.KWARG] = self.file
-            f = None
+            fd = None
         try:
             return self.cmd.popen(args, **kwargs)
         finally:
-            if f:
-                f.close()
+            if fd is not None:
+                os.close(fd)
 
 
 class StdinRedirection(BaseRedirection):
@@ -523,8 +653,39 @@ class _ERROUT(int):
 ERROUT = _ERROUT(subprocess.STDOUT)
 
 
+# the default capacity of a pipe on Linux; larger inputs won't fit in one at once
+_PIPE_CAPACITY = 65536
+
+
+def _stdin_memfd(data):
+    """Returns an anonymous in-memory file holding ``data``, rewound for reading, for
+    input larger than a pipe"""
+    f = os.fdopen(os.memfd_create("plumbum-stdin"), "w+b")
+    f.write(data)
+    f.seek(0)
+    return f
+
+
+def _stdin_pipe(data):
+    """Returns the read end of a new pipe holding all of ``data``, or ``None`` if it
+    doesn't fit in the pipe's buffer"""
+    rfd, wfd = os.pipe()
+    try:
+        os.set_blocking(wfd, False)
+        written = os.write(wfd, data) if data else 0
+    except BlockingIOError:
+        written = 0
+    finally:
+        os.close(wfd)
+    if written < len(data):
+        os.close(rfd)
+        return None
+    return os.fdopen(rfd, "rb")
+
+
 class StdinDataRedirection(BaseCommand):
     __slots__ = ("cmd", "data")
+    # unused: the data is now handed over in a single write; kept for compatibility
     CHUNK_SIZE = 16000
 
     def __init__(self, cmd, data):
@@ -546,17 +707,28 @@ class StdinDataRedirection(BaseCommand):
         return self.cmd.machine
 
     def popen(self, args=(), **kwargs):
-        if kwargs.get("stdin") not in (PIPE, None):
+        stdin = kwargs.get("stdin")
+        if stdin is not _IMPLICIT_DEVNULL and stdin not in (PIPE, None):
             raise RedirectionError("stdin is already redirected")
         data = self.data
-        if isinstance(data, str) and self._get_encoding() is not None:
-            data = data.encode(self._get_encoding())
-        f = TemporaryFile()
-        while data:
-            chunk = data[: self.CHUNK_SIZE]
-            f.write(chunk)
-            data = data[self.CHUNK_SIZE :]
-        f.seek(0)
+        if isinstance(data, str):
+            data = data.encode(self._get_encoding() or "utf-8")
+        elif not isinstance(data, bytes):
+            # a snapshot, so a mutable buffer (bytearray, ...) can still be changed or
+            # resized while it's being written
+            data = bytes(data)
+        f = None
+        if not IS_WIN32 and len(data) <= _PIPE_CAPACITY:
+            # (pipes can't be made non-blocking on Windows on all supported versions)
+            f = _stdin_pipe(data)
+        if f is None and hasattr(os, "memfd_create"):
+            f = _stdin_memfd(data)
+        if f is None:
+            # the whole input is in place before the command starts, so nothing has to
+            # keep feeding it (and outlive us) while the command runs
+            f = TemporaryFile()
+            f.write(data)
+            f.seek(0)
         kwargs["stdin"] = f
         # try:
         return self.cmd.popen(args, **kwargs)
@@ -565,7 +737,7 @@ class StdinDataRedirection(BaseCommand):
 
 
 class ConcreteCommand(BaseCommand):
-    __slots__ = ("executable",)
+    __slots__ = ("executable", "custom_encoding", "cwd", "env")
 
     # These must be defined by subclasses
     QUOTE_LEVEL: ClassVar[int]  # pylint: disable=declare-non-slot
@@ -587,22 +759,33 @@ class ConcreteCommand(BaseCommand):
 
     def formulate(self, level=0, args=()):
         argv = [str(self.executable)]
-        for a in args:
-            if a is None:
-                continue
-            if isinstance(a, BaseCommand):
-                if level >= self.QUOTE_LEVEL:
-                    argv.extend(shquote_list(a.formulate(level + 1)))
+        append = argv.append
+        extend = argv.extend
+        # strings are by far the most common arguments, so check for them first
+        if level >= self.QUOTE_LEVEL:
+            for a in args:
+                if type(a) is str:
+                    append(shquote(a))
+                elif a is None:
+                    continue
+                elif isinstance(a, BaseCommand):
+                    extend(shquote_list(a.formulate(level + 1)))
+                elif isinstance(a, (list, tuple)):
+                    extend(map(shquote, a))
                 else:
-                    argv.extend(a.formulate(level + 1))
-            elif isinstance(a, (list, tuple)):
-                argv.extend(
-                    shquote(b) if level >= self.QUOTE_LEVEL else str(b) for b in a
-                )
-            else:
-                argv.append(shquote(a) if level >= self.QUOTE_LEVEL else str(a))
-        # if self.custom_encoding:
-        #    argv = [a.encode(self.custom_encoding) for a in argv if isinstance(a, str)]
+                    append(shquote(a))
+        else:
+            for a in args:
+                if type(a) is str:
+                    append(a)
+                elif a is None:
+                    continue
+                elif isinstance(a, BaseCommand):
+                    extend(a.formulate(level + 1))
+                elif isinstance(a, (list, tuple)):
+                    extend(map(str, a))
+                else:
+                    append(str(a))
         return argv
 
     @property
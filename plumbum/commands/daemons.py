@@ -3,11 +3,13 @@ from __future__ import annotations
 import contextlib
 import errno
 import os
+import select
 import signal
 import subprocess
 import sys
 import time
 import traceback
+import weakref
 
 from plumbum.commands.processes import ProcessExecutionError
 
@@ -24,6 +26,74 @@ class _fake_lock:
         pass
 
 
+class _DaemonPopen(subprocess.Popen):
+    """A ``Popen`` for a daemonized process. The daemon isn't our child, so it can't be
+    waited for; where possible, a pidfd is used, which becomes readable when the process
+    exits (and can't be fooled by a reused pid), rather than probing with signals"""
+
+    def __init__(self, pid, argv):  # pylint: disable=super-init-not-called
+        self._child_created = True
+        self.returncode = None
+        self.stdout = None
+        self.stdin = None
+        self.stderr = None
+        self.pid = pid
+        self.universal_newlines = False
+        self._input = None
+        self._waitpid_lock = _fake_lock()
+        self._communication_started = False
+        self.args = argv
+        self.argv = argv
+
+        self._pidfd = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                self._pidfd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                self.returncode = 0  # already gone
+            except OSError:
+                pass  # not supported by this kernel
+        if self._pidfd is not None:
+            self._close_pidfd = weakref.finalize(self, os.close, self._pidfd)
+
+    def _exited(self, timeout):
+        if self._pidfd is not None:
+            poller = select.poll()
+            poller.register(self._pidfd, select.POLLIN)
+            # poll() blocks forever on a negative timeout; Popen.wait() treats it as expired
+            if poller.poll(None if timeout is None else max(0, int(timeout * 1000))):
+                self.returncode = 0
+                self._close_pidfd()
+            return
+        try:
+            os.kill(self.pid, 0)
+        except OSError as ex:
+            if ex.errno == errno.ESRCH:
+                # process does not exist
+                self.returncode = 0
+            else:
+                raise
+
+    def poll(self):
+        if self.returncode is None:
+            self._exited(0)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if self.returncode is None and self._pidfd is not None:
+            self._exited(timeout)
+        elif self.returncode is None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.poll() is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                time.sleep(0.5 if remaining is None else min(0.5, remaining))
+        if self.returncode is None:
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+
 def posix_daemonize(command, cwd, stdout=None, stderr=None, append=True):
     if stdout is None:
         stdout = os.devnull
@@ -41,16 +111,26 @@ def posix_daemonize(command, cwd, stdout=None, stderr=None, append=True):
         try:
             os.setsid()
             os.umask(0)
-            stdin = open(os.devnull, encoding="utf-8")
-            stdout = open(stdout, "a" if append else "w", encoding="utf-8")
-            stderr = open(stderr, "a" if append else "w", encoding="utf-8")
+            # open /dev/null once and share it (and the stdout file, when stderr
+            # goes to the same place) rather than opening a file object per stream
+            devnull = os.open(os.devnull, os.O_RDWR)
+            flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC)
+            stdout_fd = (
+                devnull if stdout == os.devnull else os.open(stdout, flags, 0o666)
+            )
+            if stderr == stdout:
+                stderr_fd = stdout_fd
+            elif stderr == os.devnull:
+                stderr_fd = devnull
+            else:
+                stderr_fd = os.open(stderr, flags, 0o666)
             signal.signal(signal.SIGHUP, signal.SIG_IGN)
             proc = command.popen(
                 cwd=cwd,
                 close_fds=True,
-                stdin=stdin.fileno(),
-                stdout=stdout.fileno(),
-                stderr=stderr.fileno(),
+                stdin=devnull,
+                stdout=stdout_fd,
+                stderr=stderr_fd,
             )
             os.write(wfd, str(proc.pid).encode("utf8"))
         except Exception:
@@ -72,41 +152,7 @@ def posix_daemonize(command, cwd, stdout=None, stderr=None, append=True):
         secondpid = int(output)
     else:
         raise ProcessExecutionError(argv, rc, "", output)
-    proc = subprocess.Popen.__new__(subprocess.Popen)
-    proc._child_created = True
-    proc.returncode = None
-    proc.stdout = None
-    proc.stdin = None
-    proc.stderr = None
-    proc.pid = secondpid
-    proc.universal_newlines = False
-    proc._input = None
-    proc._waitpid_lock = _fake_lock()
-    proc._communication_started = False
-    proc.args = argv
-    proc.argv = argv
-
-    def poll(self=proc):
-        if self.returncode is None:
-            try:
-                os.kill(self.pid, 0)
-            except OSError as ex:
-                if ex.errno == errno.ESRCH:
-                    # process does not exist
-                    self.returncode = 0
-                else:
-                    raise
-        return self.returncode
-
-    def wait(self=proc):
-        while self.returncode is None:
-            if self.poll() is None:
-                time.sleep(0.5)
-        return proc.returncode
-
-    proc.poll = poll
-    proc.wait = wait
-    return proc
+    return _DaemonPopen(secondpid, argv)
 
 
 def win32_daemonize(command, cwd, stdout=None, stderr=None, append=True):
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import codecs
+import os
 import sys
 from logging import DEBUG, INFO
 from select import select
 from subprocess import PIPE
+from typing import ClassVar
 
 import plumbum.commands.base
-from plumbum.commands.processes import BY_TYPE, ProcessExecutionError, run_proc
-from plumbum.lib import read_fd_decode_safely
+from plumbum.commands.processes import (
+    BY_TYPE,
+    ProcessExecutionError,
+    _communicate_pipeline,
+    _finish_proc,
+    _get_piped_streams,
+    _register_proc_timeout,
+    run_proc,
+)
+from plumbum.lib import IS_WIN32, _lazy_import
 
 
 class Future:
@@ -16,16 +27,26 @@ class Future:
     and stderr.
     """
 
+    __slots__ = (
+        "proc",
+        "_expected_retcode",
+        "_timeout",
+        "_result",
+        "_output",
+        "_chunks",
+        "__weakref__",
+    )
+
     def __init__(self, proc, expected_retcode, timeout=None):
         self.proc = proc
         self._expected_retcode = expected_retcode
         self._timeout = timeout
-        self._returncode = None
-        self._stdout = None
-        self._stderr = None
+        self._result = None  # (returncode, stdout, stderr) once finished
+        self._output = None
+        self._chunks = None  # what as_completed() read so far, per stream
 
     def __repr__(self):
-        running = self._returncode if self.ready() else "running"
+        running = self._result[0] if self.ready() else "running"
         return f"<Future {self.proc.argv!r} ({running})>"
 
     def poll(self):
@@ -33,36 +54,166 @@ class Future:
         or ``True`` if terminated"""
         if self.proc.poll() is not None:
             self.wait()
-        return self._returncode is not None
+        return self._result is not None
 
     ready = poll
 
     def wait(self):
         """Waits for the process to terminate; will raise a
         :class:`plumbum.commands.ProcessExecutionError` in case of failure"""
-        if self._returncode is not None:
+        if self._result is not None:
             return
-        self._returncode, self._stdout, self._stderr = run_proc(
-            self.proc, self._expected_retcode, self._timeout
-        )
+        if self._output is None and self._chunks is not None:
+            # as_completed() was left before this process finished; read on from there
+            self._output = _communicate_pipeline(self.proc, self._chunks)
+        if self._output is None:
+            result = run_proc(self.proc, self._expected_retcode, self._timeout)
+        else:
+            # the output was already collected by as_completed()
+            result = _finish_proc(
+                self.proc, self._expected_retcode, self._timeout, *self._output
+            )
+        self._result = result
+
+    @staticmethod
+    def as_completed(futures):
+        """Yields the given futures in the order their processes terminate, reading the
+        output of all of them meanwhile, so a single thread can wait on many background
+        commands. The yielded futures are done: their ``returncode``, ``stdout`` and
+        ``stderr`` are available without blocking (and raise
+        :class:`plumbum.commands.ProcessExecutionError` in case of failure).
+        Like ``wait()``, this closes the processes' stdin. It's fine to stop iterating
+        early: the futures that weren't yielded keep what was read of their output, and
+        waiting on them reads on from there.
+
+        Example::
+
+            futures = [ls[d] & BG for d in dirs]
+            for f in Future.as_completed(futures):
+                print(f.stdout)
+        """
+        futures = list(futures)
+        if IS_WIN32:
+            # select() can't wait on pipes on Windows
+            for future in futures:
+                if future._result is None and future._output is None:
+                    _register_proc_timeout(future.proc, future._timeout)
+                    future._output = future.proc.communicate()
+                yield future
+            return
+
+        import selectors
+
+        done = []
+        polled = []
+        pending = {}  # future -> number of its fds not closed yet
+        pidfds = []
+        sel = selectors.DefaultSelector()
+
+        def finish(future):
+            if future._chunks is None:
+                # not a local process
+                future._output = future.proc.communicate()
+            else:
+                future._output = _communicate_pipeline(future.proc, future._chunks)
+                future._chunks = None
+
+        def watch_exit(future):
+            # a pidfd becomes readable once the process exits
+            try:
+                pidfd = os.pidfd_open(future.proc.pid)
+            except (AttributeError, OSError):
+                polled.append(future)
+                return
+            pidfds.append(pidfd)
+            sel.register(pidfd, selectors.EVENT_READ, (future, None))
+            pending[future] = 1
+
+        try:
+            for future in futures:
+                proc = future.proc
+                if future._result is not None or future._output is not None:
+                    done.append(future)
+                    continue
+                _register_proc_timeout(proc, future._timeout)
+                streams = [stream for _, stream in _get_piped_streams(proc)]
+                try:
+                    fds = [stream.fileno() for stream in streams]
+                except (AttributeError, OSError, ValueError):
+                    # not a local process (e.g., Paramiko); check on it from time to time
+                    polled.append(future)
+                    continue
+                if proc.stdin:
+                    proc.stdin.close()
+                # the output is kept on the future, so that wait() can read on from
+                # where we left off if the caller stops iterating early
+                if future._chunks is None:
+                    future._chunks = {}
+                for stream in streams:
+                    future._chunks.setdefault(stream, [])
+                if streams:
+                    for fd, stream in zip(fds, streams):
+                        sel.register(fd, selectors.EVENT_READ, (future, stream))
+                    pending[future] = len(fds)
+                elif proc.poll() is not None:
+                    finish(future)
+                    done.append(future)
+                else:
+                    watch_exit(future)
+
+            yield from done
+            while pending or polled:
+                for key, _ in sel.select(0.1 if polled else None):
+                    future, stream = key.data
+                    if stream is not None:
+                        data = os.read(key.fd, 65536)
+                        if data:
+                            future._chunks[stream].append(data)
+                            continue
+                        sel.unregister(key.fd)
+                        stream.close()
+                    else:
+                        sel.unregister(key.fd)
+                    pending[future] -= 1
+                    if pending[future]:
+                        continue
+                    del pending[future]
+                    if stream is not None and future.proc.poll() is None:
+                        # it closed its pipes, but it's still running
+                        watch_exit(future)
+                        continue
+                    finish(future)
+                    yield future
+                for future in list(polled):
+                    if future.proc.poll() is not None:
+                        polled.remove(future)
+                        finish(future)
+                        yield future
+        finally:
+            sel.close()
+            for pidfd in pidfds:
+                os.close(pidfd)
 
     @property
     def stdout(self):
         """The process' stdout; accessing this property will wait for the process to finish"""
-        self.wait()
-        return self._stdout
+        if self._result is None:
+            self.wait()
+        return self._result[1]
 
     @property
     def stderr(self):
         """The process' stderr; accessing this property will wait for the process to finish"""
-        self.wait()
-        return self._stderr
+        if self._result is None:
+            self.wait()
+        return self._result[2]
 
     @property
     def returncode(self):
         """The process' returncode; accessing this property will wait for the process to finish"""
-        self.wait()
-        return self._returncode
+        if self._result is None:
+            self.wait()
+        return self._result[0]
 
 
 # ===================================================================================================
@@ -73,24 +224,31 @@ class Future:
 class ExecutionModifier:
     __slots__ = ("__weakref__",)
 
-    def __repr__(self):
-        """Automatically creates a representation for given subclass with slots.
-        Ignore hidden properties."""
-        slots = {}
-        for cls in self.__class__.__mro__:
-            slots_list = getattr(cls, "__slots__", ())
+    # the public slots shown by __repr__, collected once per class
+    _repr_slots: ClassVar[tuple[str, ...]] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        names = {}
+        for klass in cls.__mro__:
+            slots_list = getattr(klass, "__slots__", ())
             if isinstance(slots_list, str):
                 slots_list = (slots_list,)
             for prop in slots_list:
                 if prop[0] != "_":
-                    slots[prop] = getattr(self, prop)
-        mystrs = (f"{name} = {value}" for name, value in slots.items())
-        mystrs_str = ", ".join(mystrs)
+                    names[prop] = None
+        cls._repr_slots = tuple(names)
+
+    def __repr__(self):
+        """Automatically creates a representation for given subclass with slots.
+        Ignore hidden properties."""
+        mystrs_str = ", ".join(
+            f"{name} = {getattr(self, name)}" for name in self._repr_slots
+        )
         return f"{self.__class__.__name__}({mystrs_str})"
 
-    @classmethod
-    def __call__(cls, *args, **kwargs):
-        return cls(*args, **kwargs)
+    def __call__(self, *args, **kwargs):
+        return type(self)(*args, **kwargs)
 
 
 class _BG(ExecutionModifier):
@@ -190,48 +348,48 @@ class _TEE(ExecutionModifier):
             err = p.stderr
             buffers = {out: outbuf, err: errbuf}
             tee_to = {out: sys.stdout, err: sys.stderr}
-            done = False
-            while not done:
-                # After the process exits, we have to do one more
-                # round of reading in order to drain any data in the
-                # pipe buffer. Thus, we check poll() here,
-                # unconditionally enter the read loop, and only then
-                # break out of the outer loop if the process has
-                # exited.
-                done = p.poll() is not None
-
-                # We continue this loop until we've done a full
-                # `select()` call without collecting any input. This
-                # ensures that our final pass -- after process exit --
-                # actually drains the pipe buffers, even if it takes
-                # multiple calls to read().
-                progress = True
-                while progress:
-                    progress = False
-                    ready, _, _ = select((out, err), (), ())
-                    for fd in ready:
-                        buf = buffers[fd]
-                        data, text = read_fd_decode_safely(fd, 4096)
-                        if not data:  # eof
-                            continue
-                        progress = True
+            # an incremental decoder keeps a character split between two reads
+            # until its remaining bytes arrive, instead of reading more to finish it
+            decoders = {
+                out: codecs.getincrementaldecoder("utf-8")("ignore"),
+                err: codecs.getincrementaldecoder("utf-8")("ignore"),
+            }
+            # Read until both pipes reach EOF, which drains them fully once the
+            # process exits. A pipe at EOF always selects as readable, so stop
+            # watching it, or we'd spin while the other one is still open.
+            streams = [out, err]
+            while streams:
+                ready, _, _ = select(streams, (), ())
+                for fd in ready:
+                    data = os.read(fd.fileno(), 65536)
+                    if not data:  # eof
+                        streams.remove(fd)
+                        continue
+                    text = decoders[fd].decode(data)
+
+                    # Python conveniently line-buffers stdout and stderr for
+                    # us, so all we need to do is write to them
+                    tee_to[fd].write(text)
+
+                    # And then "unbuffered" is just flushing after each write
+                    if not self.buffered:
+                        tee_to[fd].flush()
+
+                    # keep the decoded text, so it needn't be decoded again
+                    buffers[fd].append(text)
 
-                        # Python conveniently line-buffers stdout and stderr for
-                        # us, so all we need to do is write to them
-
-                        # This will automatically add up to three bytes if it cannot be decoded
-                        tee_to[fd].write(text)
-
-                        # And then "unbuffered" is just flushing after each write
-                        if not self.buffered:
-                            tee_to[fd].flush()
+            p.wait()  # To get return code in p
+            return p.returncode, "".join(outbuf), "".join(errbuf)
 
-                        buf.append(data)
 
-            p.wait()  # To get return code in p
-            stdout = "".join([x.decode("utf-8") for x in outbuf])
-            stderr = "".join([x.decode("utf-8") for x in errbuf])
-            return p.returncode, stdout, stderr
+def _discarded_output(cmd):
+    """Keyword arguments for running ``cmd`` when only its exit code matters. Local
+    processes write straight to the null device then, so there are no pipes to drain
+    (unless the command redirects its output itself)"""
+    if isinstance(cmd.machine, _lazy_import("plumbum.machines.local", "LocalMachine")):
+        devnull = plumbum.commands.base._IMPLICIT_DEVNULL
+        return {"stdout": devnull, "stderr": devnull}
+    return {}
 
 
 class _TF(ExecutionModifier):
@@ -266,10 +424,6 @@ class _TF(ExecutionModifier):
         self.FG = FG
         self.timeout = timeout
 
-    @classmethod
-    def __call__(cls, *args, **kwargs):
-        return cls(*args, **kwargs)
-
     def __rand__(self, cmd):
         try:
             if self.FG:
@@ -281,7 +435,9 @@ class _TF(ExecutionModifier):
                     timeout=self.timeout,
                 )
             else:
-                cmd(retcode=self.retcode, timeout=self.timeout)
+                cmd(
+                    retcode=self.retcode, timeout=self.timeout, **_discarded_output(cmd)
+                )
             return True
         except ProcessExecutionError:
             return False
@@ -312,10 +468,6 @@ class _RETCODE(ExecutionModifier):
         self.foreground = FG
         self.timeout = timeout
 
-    @classmethod
-    def __call__(cls, *args, **kwargs):
-        return cls(*args, **kwargs)
-
     def __rand__(self, cmd):
         if self.foreground:
             result = cmd.run(
@@ -323,7 +475,7 @@ class _RETCODE(ExecutionModifier):
             )
             return result[0]
 
-        return cmd.run(retcode=None, timeout=self.timeout)[0]
+        return cmd.run(retcode=None, timeout=self.timeout, **_discarded_output(cmd))[0]
 
 
 class _NOHUP(ExecutionModifier):
@@ -4,6 +4,8 @@ import atexit
 import contextlib
 import heapq
 import math
+import os
+import re
 import time
 from queue import Empty as QueueEmpty
 from queue import Queue
@@ -48,6 +50,82 @@ def _get_piped_streams(proc):
     return streams
 
 
+def _communicate_pipeline(proc, chunks=None):
+    """Like ``proc.communicate()``, but for the last process of a pipeline: reads the
+    standard streams of all processes in the pipeline (see :func:`_get_piped_streams`)
+    at the same time, so that a process writing a lot to a pipe nobody else reads
+    (e.g., the stderr of an earlier command) doesn't block the whole pipeline.
+    The stderr of the earlier processes is kept on them as ``_stderr_data``, so their
+    failures can be reported with their own error output.
+
+    :param chunks: What was already read from the streams, as a dict of stream to a
+                   list of chunks (see :func:`Future.as_completed
+                   <plumbum.commands.modifiers.Future.as_completed>`); the streams
+                   that are still open are read on from where it left off
+
+    :returns: A tuple of (stdout, stderr) of ``proc``
+    """
+    if IS_WIN32:
+        return _communicate_pipeline_threads(proc)
+
+    import selectors
+
+    # a pipeline only has a handful of pipes and lives for a single call; poll() needs
+    # no kernel object to be created and kept in sync, unlike epoll/kqueue
+    selector = getattr(selectors, "PollSelector", selectors.DefaultSelector)
+
+    if proc.stdin:
+        proc.stdin.close()
+    if chunks is None:
+        chunks = {}
+    with selector() as sel:
+        for _, stream in _get_piped_streams(proc):
+            chunks.setdefault(stream, [])
+            sel.register(stream, selectors.EVENT_READ)
+        while sel.get_map():
+            for key, _ in sel.select():
+                data = os.read(key.fd, 65536)
+                if data:
+                    chunks[key.fileobj].append(data)
+                else:
+                    sel.unregister(key.fileobj)
+                    key.fileobj.close()
+    proc.wait()
+
+    def collected(stream):
+        return b"".join(chunks[stream]) if stream in chunks else None
+
+    srcproc = getattr(proc, "srcproc", None)
+    while srcproc is not None:
+        srcproc._stderr_data = collected(srcproc.stderr)
+        srcproc = getattr(srcproc, "srcproc", None)
+    return collected(proc.stdout), collected(proc.stderr)
+
+
+def _communicate_pipeline_threads(proc):
+    # pipes can't be selected on Windows, so read the stderr of the earlier processes
+    # in threads while communicating with the last one
+    def read_stderr(srcproc):
+        with srcproc.stderr:
+            srcproc._stderr_data = srcproc.stderr.read()
+
+    readers = []
+    srcproc = proc.srcproc
+    while srcproc is not None:
+        if srcproc.stderr is not None and not srcproc.stderr.closed:
+            reader = Thread(
+                target=read_stderr, args=(srcproc,), name="PlumbumStderrThread"
+            )
+            reader.daemon = True
+            reader.start()
+            readers.append(reader)
+        srcproc = getattr(srcproc, "srcproc", None)
+    stdout, stderr = proc.communicate()
+    for reader in readers:
+        reader.join()
+    return stdout, stderr
+
+
 def _iter_lines_posix(proc, decode, linesize, line_timeout=None):
     from selectors import EVENT_READ, DefaultSelector
 
@@ -136,6 +214,20 @@ _iter_lines = _iter_lines_win32 if IS_WIN32 else _iter_lines_posix
 # ===================================================================================================
 # Exceptions
 # ===================================================================================================
+# line boundaries recognized by str.splitlines(), other than "\n"
+_find_other_line_break = re.compile("[\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]").search
+
+
+def _indent_lines(text, sep="\n              | "):
+    """Joins the lines of ``text`` with ``sep``, like ``sep.join(text.splitlines())``"""
+    if _find_other_line_break(text) is not None:
+        return sep.join(text.splitlines())
+    # the common case: a single replace() instead of building a list of lines
+    if text.endswith("\n"):
+        text = text[:-1]
+    return text.replace("\n", sep)
+
+
 class ProcessExecutionError(OSError):
     """Represents the failure of a process. When the exit code of a terminated process does not
     match the expected result, this exception is raised by :func:`run_proc
@@ -153,26 +245,48 @@ class ProcessExecutionError(OSError):
         self.host = host
         self.argv = argv
         self.retcode = retcode
-        if isinstance(stdout, bytes):
+        if type(stdout) is bytes:
             stdout = ascii(stdout)
-        if isinstance(stderr, bytes):
+        if type(stderr) is bytes:
             stderr = ascii(stderr)
         self.stdout = stdout
         self.stderr = stderr
 
+    def __reduce__(self):
+        # the formatted message is only a cache; don't pickle it along with the output
+        state = dict(self.__dict__)
+        state.pop("_formatted", None)
+        return type(self), self.args, state
+
     def __str__(self):
+        # the output may be large, so format it only once (unless the attributes change;
+        # argv is copied into the key, as the list itself may be changed in place)
+        key = (
+            self.message,
+            self.host,
+            tuple(self.argv),
+            self.retcode,
+            self.stdout,
+            self.stderr,
+        )
+        cached = getattr(self, "_formatted", None)
+        if cached is None or cached[0] != key:
+            cached = self._formatted = (key, self._format())
+        return cached[1]
+
+    def _format(self):
         # avoid an import cycle
         from plumbum.commands.base import shquote_list
 
-        stdout = "\n              | ".join(str(self.stdout).splitlines())
-        stderr = "\n              | ".join(str(self.stderr).splitlines())
+        stdout = _indent_lines(str(self.stdout))
+        stderr = _indent_lines(str(self.stderr))
         cmd = " ".join(shquote_list(self.argv))
         lines = []
         if self.message:
             lines = [self.message, "\nReturn code:  | ", str(self.retcode)]
         else:
             lines = ["Unexpected exit code: ", str(self.retcode)]
-        cmd = "\n              | ".join(cmd.splitlines())
+        cmd = _indent_lines(cmd)
         lines += ["\nCommand line: | ", cmd]
         if self.host:
             lines += ["\nHost:         | ", self.host]
@@ -317,15 +431,28 @@ def run_proc(proc, retcode, timeout=None):
     :returns: A tuple of (return code, stdout, stderr)
     """
     _register_proc_timeout(proc, timeout)
-    stdout, stderr = proc.communicate()
+    if getattr(proc, "srcproc", None) is not None:
+        stdout, stderr = _communicate_pipeline(proc)
+    else:
+        stdout, stderr = proc.communicate()
+    return _finish_proc(proc, retcode, timeout, stdout, stderr)
+
+
+def _finish_proc(proc, retcode, timeout, stdout, stderr):
+    """The second half of :func:`run_proc`, once the output of ``proc`` has been read"""
     proc._end_time = time.time()
-    if not stdout:
+    # a stream that wasn't piped gives None; keep whatever type the process produced
+    # otherwise (bytes, or str if it was opened in text mode), and decode only bytes
+    if stdout is None:
         stdout = b""
-    if not stderr:
+    if stderr is None:
         stderr = b""
-    if getattr(proc, "custom_encoding", None):
-        stdout = stdout.decode(proc.custom_encoding, "ignore")
-        stderr = stderr.decode(proc.custom_encoding, "ignore")
+    encoding = getattr(proc, "custom_encoding", None)
+    if encoding:
+        if not isinstance(stdout, str):
+            stdout = stdout.decode(encoding, "ignore")
+        if not isinstance(stderr, str):
+            stderr = stderr.decode(encoding, "ignore")
 
     return _check_process(proc, retcode, timeout, stdout, stderr)
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import functools
+import importlib
 import inspect
 import os
 import sys
@@ -48,6 +50,13 @@ class StaticProperty:
         return self._function()
 
 
+@functools.lru_cache(maxsize=None)
+def _lazy_import(module, name):
+    """Returns ``name`` from ``module``, importing it on first use: for modules that are
+    heavy to import, or that import the caller's module themselves"""
+    return getattr(importlib.import_module(module), name)
+
+
 def getdoc(obj):
     """
     This gets a docstring if available, and cleans it, but does not look up docs in
@@ -19,16 +19,20 @@ class PopenAddons:
                 getattr(self, "argv", None),
             )
 
-        if retcode is not None:
-            if hasattr(retcode, "__contains__"):
-                if self.returncode not in retcode:
-                    raise ProcessExecutionError(
-                        getattr(self, "argv", None), self.returncode, stdout, stderr
-                    )
-            elif self.returncode != retcode:
-                raise ProcessExecutionError(
-                    getattr(self, "argv", None), self.returncode, stdout, stderr
-                )
+        if retcode is None:
+            return
+        returncode = self.returncode
+        if type(retcode) is int:
+            if returncode == retcode:
+                return
+        elif hasattr(retcode, "__contains__"):
+            if returncode in retcode:
+                return
+        elif returncode == retcode:
+            return
+        raise ProcessExecutionError(
+            getattr(self, "argv", None), returncode, stdout, stderr
+        )
 
 
 class BaseMachine:
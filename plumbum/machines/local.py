@@ -282,14 +282,12 @@ class LocalMachine(BaseMachine):
         if cwd is None:
             cwd = self.cwd
 
-        envs = [self.env, env]
-        env = {}
-        for _env in envs:
-            if not _env:
-                continue
-            if isinstance(_env, BaseEnv):
-                _env = _env.getdict()
-            env.update(_env)
+        # getdict() already builds a fresh dict, so merge the overrides into it
+        # rather than copying the whole environment once more
+        full_env = self.env.getdict() if self.env else {}
+        if env:
+            full_env.update(env.getdict() if isinstance(env, BaseEnv) else env)
+        env = full_env
 
         if self._as_user_stack:
             argv, executable = self._as_user_stack[-1](argv)
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import contextlib
 import logging
-import random
+import os
 import threading
 import time
 
 from plumbum.commands import BaseCommand, run_proc
 from plumbum.commands.processes import ProcessExecutionError
+from plumbum.lib import IS_WIN32
 from plumbum.machines.base import PopenAddons
 
 
@@ -71,6 +72,20 @@ class MarkedPipe:
         return line
 
 
+def _find_marker_line(buf, marker, start):
+    """Returns where the first line of ``buf`` (from ``start`` on) that consists of
+    ``marker`` begins, or -1 if no complete line does"""
+    end = buf.rfind(b"\n") + 1
+    index = buf.find(marker, start, end)
+    while index >= 0:
+        line_start = buf.rfind(b"\n", 0, index) + 1
+        line_end = buf.find(b"\n", index) + 1
+        if buf[line_start:line_end].strip() == marker:
+            return line_start
+        index = buf.find(marker, line_end, end)
+    return -1
+
+
 class SessionPopen(PopenAddons):
     """A shell-session-based ``Popen``-like object (has the following attributes: ``stdin``,
     ``stdout``, ``stderr``, ``returncode``)"""
@@ -102,6 +117,33 @@ class SessionPopen(PopenAddons):
         :param input: An optional bytes/buffer object to send to the process over stdin
         :returns: A tuple of (stdout, stderr)
         """
+        if self.isatty or IS_WIN32:
+            # a single stream can't block the other one / pipes can't be selected
+            stdout, stderr = self._communicate_by_lines(input)
+        else:
+            try:
+                streams = {
+                    pipe.pipe.fileno(): (name, pipe)
+                    for name, pipe in (("1", self.stdout), ("2", self.stderr))
+                    if pipe.pipe is not None
+                }
+            except (AttributeError, OSError, ValueError):
+                # not a local process (e.g., a Paramiko channel)
+                stdout, stderr = self._communicate_by_lines(input)
+            else:
+                stdout, stderr = self._communicate_selected(streams, input)
+        if self.isatty:
+            stdout = stdout.partition(b"\n")[2]  # discard first line of prompt
+        # the last line is the exit code
+        end = stdout.rfind(b"\n", 0, -1) + 1
+        try:
+            self.returncode = int(stdout[end:])
+        except ValueError:
+            self.returncode = "Unknown"
+        self._done = True
+        return bytes(stdout[:end]), bytes(stderr)
+
+    def _communicate_by_lines(self, input):  # pylint: disable=redefined-builtin
         stdout = []
         stderr = []
         sources = [("1", stdout, self.stdout)]
@@ -109,12 +151,13 @@ class SessionPopen(PopenAddons):
             # in tty mode, stdout and stderr are unified
             sources.append(("2", stderr, self.stderr))
         i = 0
+        pending = memoryview(input or b"")
+        offset = 0
         while sources:
-            if input:
-                chunk = input[:1000]
-                self.stdin.write(chunk)
+            if offset < len(pending):
+                self.stdin.write(pending[offset : offset + 1000])
                 self.stdin.flush()
-                input = input[1000:]
+                offset += 1000
             i = (i + 1) % len(sources)
             name, coll, pipe = sources[i]
             try:
@@ -122,72 +165,140 @@ class SessionPopen(PopenAddons):
                 shell_logger.debug("%s> %r", name, line)
             except EOFError as err:
                 shell_logger.debug("%s> Nothing returned.", name)
-
-                self.proc.poll()
-                returncode = self.proc.returncode
-                stdout = b"".join(stdout).decode(self.custom_encoding, "ignore")
-                stderr = b"".join(stderr).decode(self.custom_encoding, "ignore")
-                argv = self.argv.decode(self.custom_encoding, "ignore").split(";")[:1]
-
-                if returncode == 5:
-                    raise IncorrectLogin(
-                        argv,
-                        returncode,
-                        stdout,
-                        stderr,
-                        message="Incorrect username or password provided",
-                        host=self.host,
-                    ) from None
-                if returncode == 6:
-                    raise HostPublicKeyUnknown(
-                        argv,
-                        returncode,
-                        stdout,
-                        stderr,
-                        message="The authenticity of the host can't be established",
-                        host=self.host,
-                    ) from None
-                if returncode != 0:
-                    raise SSHCommsError(
-                        argv,
-                        returncode,
-                        stdout,
-                        stderr,
-                        message="SSH communication failed",
-                        host=self.host,
-                    ) from None
-                if name == "2":
-                    raise SSHCommsChannel2Error(
-                        argv,
-                        returncode,
-                        stdout,
-                        stderr,
-                        message="No stderr result detected. Does the remote have Bash as the default shell?",
-                        host=self.host,
-                    ) from None
-
-                raise SSHCommsError(
-                    argv,
-                    returncode,
-                    stdout,
-                    stderr,
-                    message="No communication channel detected. Does the remote exist?",
-                    host=self.host,
-                ) from err
+                self._raise_comms_error(name, b"".join(stdout), b"".join(stderr), err)
             if not line:
                 del sources[i]
             else:
                 coll.append(line)
-        if self.isatty:
-            stdout.pop(0)  # discard first line of prompt
-        try:
-            self.returncode = int(stdout.pop(-1))
-        except (IndexError, ValueError):
-            self.returncode = "Unknown"
-        self._done = True
-        stdout = b"".join(stdout)
-        stderr = b"".join(stderr)
-        return stdout, stderr
+        return b"".join(stdout), b"".join(stderr)
+
+    def _communicate_selected(self, streams, input):  # pylint: disable=redefined-builtin
+        """Reads stdout and stderr as data becomes available on either of them, so that
+        a command writing a lot to one of them can't block while we wait on the other"""
+        import select
+        import selectors
+
+        output = {"1": bytearray(), "2": bytearray()}
+        scanned = {
+            "1": 0,
+            "2": 0,
+        }  # where the lines not yet checked for the marker start
+        pending = memoryview(input or b"")
+        offset = 0
+        # a write of up to PIPE_BUF bytes to a pipe with room for them never blocks
+        chunk_size = getattr(select, "PIPE_BUF", 512)
+
+        def consume(name, marked, data):
+            """Adds ``data`` to the output; returns whether the marker was reached"""
+            buf = output[name]
+            buf += data
+            end = _find_marker_line(buf, marked.marker, scanned[name])
+            if end < 0:
+                scanned[name] = buf.rfind(b"\n") + 1
+                return False
+            # the marker is the last thing the shell writes
+            del buf[end:]
+            marked.pipe = None
+            return True
+
+        # an earlier readline() may have left data (or even the marker) in the buffer,
+        # which select() can't see; take it without blocking on the pipe itself
+        readable = {}
+        for fd, (name, marked) in streams.items():
+            os.set_blocking(fd, False)
+            try:
+                data = marked.pipe.read1(65536)
+            except BlockingIOError:
+                data = None
+            finally:
+                os.set_blocking(fd, True)
+            # an empty read here means nothing was buffered; EOF is detected below
+            if not data or not consume(name, marked, data):
+                readable[fd] = (name, marked)
+
+        with selectors.DefaultSelector() as sel:
+            for fd, (name, marked) in readable.items():
+                sel.register(fd, selectors.EVENT_READ, (name, marked))
+            if pending:
+                self.stdin.flush()
+                stdin_fd = self.stdin.fileno()
+                sel.register(stdin_fd, selectors.EVENT_WRITE)
+            readers = len(readable)
+            while readers:
+                for key, _ in sel.select():
+                    if key.data is None:
+                        offset += os.write(
+                            stdin_fd, pending[offset : offset + chunk_size]
+                        )
+                        if offset >= len(pending):
+                            sel.unregister(stdin_fd)
+                        continue
+                    name, marked = key.data
+                    # the pipe is readable, so this doesn't block
+                    data = marked.pipe.read1(65536)
+                    shell_logger.debug("%s> %r", name, data)
+                    if not data:
+                        shell_logger.debug("%s> Nothing returned.", name)
+                        self._raise_comms_error(
+                            name, output["1"], output["2"], EOFError()
+                        )
+                    if consume(name, marked, data):
+                        sel.unregister(key.fd)
+                        readers -= 1
+        return output["1"], output["2"]
+
+    def _raise_comms_error(self, name, stdout, stderr, err):
+        self.proc.poll()
+        returncode = self.proc.returncode
+        stdout = stdout.decode(self.custom_encoding, "ignore")
+        stderr = stderr.decode(self.custom_encoding, "ignore")
+        argv = self.argv.decode(self.custom_encoding, "ignore").split(";")[:1]
+
+        if returncode == 5:
+            raise IncorrectLogin(
+                argv,
+                returncode,
+                stdout,
+                stderr,
+                message="Incorrect username or password provided",
+                host=self.host,
+            ) from None
+        if returncode == 6:
+            raise HostPublicKeyUnknown(
+                argv,
+                returncode,
+                stdout,
+                stderr,
+                message="The authenticity of the host can't be established",
+                host=self.host,
+            ) from None
+        if returncode != 0:
+            raise SSHCommsError(
+                argv,
+                returncode,
+                stdout,
+                stderr,
+                message="SSH communication failed",
+                host=self.host,
+            ) from None
+        if name == "2":
+            raise SSHCommsChannel2Error(
+                argv,
+                returncode,
+                stdout,
+                stderr,
+                message="No stderr result detected. Does the remote have Bash as the default shell?",
+                host=self.host,
+            ) from None
+
+        raise SSHCommsError(
+            argv,
+            returncode,
+            stdout,
+            stderr,
+            message="No communication channel detected. Does the remote exist?",
+            host=self.host,
+        ) from err
 
 
 class ShellSession:
@@ -211,6 +322,17 @@ class ShellSession:
                             is seen, the shell process is killed
     """
 
+    __slots__ = (
+        "host",
+        "proc",
+        "custom_encoding",
+        "isatty",
+        "_lock",
+        "_current",
+        "_startup_result",
+        "__weakref__",
+    )
+
     def __init__(
         self, proc, encoding="auto", isatty=False, connect_timeout=5, *, host=None
     ):
@@ -280,7 +402,7 @@ class ShellSession:
             raise ShellSessionError("Each shell may start only one process at a time")
 
         full_cmd = cmd.formulate(1) if isinstance(cmd, BaseCommand) else cmd
-        marker = f"--.END{time.time() * random.random()}.--"
+        marker = f"--.END{os.urandom(8).hex()}.--"
         if full_cmd.strip():
             full_cmd += " ; "
         else:
@@ -6,10 +6,9 @@ import logging
 import os
 import shutil
 import urllib.parse as urlparse
-import urllib.request as urllib
 from contextlib import contextmanager
 
-from plumbum.lib import IS_WIN32
+from plumbum.lib import IS_WIN32, _lazy_import
 from plumbum.path.base import FSUser, Path
 from plumbum.path.remote import RemotePath
 
@@ -303,7 +302,8 @@ class LocalPath(Path):
                 raise
 
     def as_uri(self, scheme="file"):
-        return urlparse.urljoin(str(scheme) + ":", urllib.pathname2url(str(self)))
+        pathname2url = _lazy_import("urllib.request", "pathname2url")
+        return urlparse.urljoin(str(scheme) + ":", pathname2url(str(self)))
 
     @property
     def drive(self):
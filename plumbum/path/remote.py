@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import errno
 import os
-import urllib.request as urllib
 from contextlib import contextmanager
 
 from plumbum.commands import ProcessExecutionError, shquote
+from plumbum.lib import _lazy_import
 from plumbum.path.base import FSUser, Path
 
 
@@ -305,7 +305,7 @@ class RemotePath(Path):
         )
 
     def as_uri(self, scheme="ssh"):
-        suffix = urllib.pathname2url(str(self))
+        suffix = _lazy_import("urllib.request", "pathname2url")(str(self))
         return f"{scheme}://{self.remote._fqhost}{suffix}"
 
     @property
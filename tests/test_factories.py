@@ -180,3 +180,8 @@ class TestHTMLColor:
         assert "This is tagged" | htmlcolors.red & htmlcolors.em == twin_tagged
         assert "This is tagged" | htmlcolors.em & htmlcolors.red == twin_tagged
         assert htmlcolors.em & htmlcolors.red | "This is tagged" == twin_tagged
+
+    def test_html_attribute_order(self):
+        nested = '<b><em><span style="text-decoration: underline;">x</span></em></b>'
+        assert htmlcolors.underline & htmlcolors.em & htmlcolors.bold | "x" == nested
+        assert htmlcolors.bold & htmlcolors.underline & htmlcolors.em | "x" == nested
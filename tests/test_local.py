@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import pickle
 import signal
+import subprocess
 import sys
 import time
 from pathlib import Path
@@ -499,6 +500,26 @@ class TestLocalMachine:
         assert rc == 2
         assert "usage" in out.lower()
 
+    @skip_on_windows
+    def test_redirection_passes_popen_kwargs(self, tmp_path):
+        from plumbum.cmd import printenv, pwd, sh
+
+        out = str(tmp_path / "out.txt")
+        (pwd > out).run(cwd=str(tmp_path))
+        (pwd >> out)(cwd="/")
+        assert (tmp_path / "out.txt").read_text().splitlines() == [str(tmp_path), "/"]
+
+        env_out = tmp_path / "env.txt"
+        (printenv["FOO"] > str(env_out)).run(env={"FOO": "bar"})
+        assert env_out.read_text() == "bar\n"
+        err = tmp_path / "err.txt"
+        (sh["-c", "printenv FOO >&2"] >= str(err)).run(env={"FOO": "baz"})
+        assert err.read_text() == "baz\n"
+        ((sh["-c", "cat; printenv FOO"] << "spam ") > str(env_out)).run(
+            env={"FOO": "eggs"}
+        )
+        assert env_out.read_text() == "spam eggs\n"
+
     @skip_on_windows
     def test_popen(self):
         from plumbum.cmd import ls
@@ -514,6 +535,13 @@ class TestLocalMachine:
         rc, out, err = (ls | grep["non_exist1N9"]).run(retcode=1)
         assert rc == 1
 
+    @skip_on_windows
+    def test_run_text_mode(self):
+        from plumbum.cmd import echo, true
+
+        assert echo["hi"].run(text=True) == (0, "hi\n", "")
+        assert true.run(text=True) == (0, "", "")
+
     def test_timeout(self):
         from plumbum.cmd import sleep
 
@@ -629,6 +657,82 @@ class TestLocalMachine:
         assert (command_false & TEE(retcode=None))[0] == 1
         assert (command_false_2 & TEE(retcode=None))[0] == 1
 
+    @skip_on_windows
+    @pytest.mark.timeout(10)
+    def test_futures_as_completed(self):
+        from plumbum.cmd import false, sleep
+        from plumbum.commands import Future
+
+        py = local[sys.executable]
+        slow = py["-c", "import time; time.sleep(0.2); print('slow')"] & BG
+        # more output than fits in a pipe, so it only finishes if it is drained
+        chatty = py["-c", "import sys; sys.stdout.write('x' * 300000)"] & BG
+        quiet = ((sleep["0.1"] > os.devnull) >= os.devnull) & BG
+        failed = false & BG
+
+        futures = list(Future.as_completed([slow, quiet, chatty, failed]))
+        assert len(futures) == 4
+        assert set(futures) == {slow, quiet, chatty, failed}
+        assert len(chatty.stdout) == 300000
+        assert quiet.stdout == ""
+        assert slow.stdout == "slow\n"
+        with pytest.raises(ProcessExecutionError):
+            failed.wait()
+
+    @skip_on_windows
+    @pytest.mark.timeout(20)
+    def test_futures_as_completed_left_early(self):
+        from plumbum.commands import Future
+
+        py = local[sys.executable]
+        script = "import sys, time; print('a' * 100000); sys.stdout.flush(); time.sleep(0.5); print('b')"
+        futures = [py["-c", script] & BG for _ in range(3)]
+        completed = Future.as_completed(futures)
+        next(completed)
+        completed.close()
+        # the ones left unfinished pick up from what as_completed() had read
+        for future in futures:
+            assert future.stdout == "a" * 100000 + "\nb\n"
+            assert future.returncode == 0
+
+    @skip_on_windows
+    @pytest.mark.timeout(20)
+    def test_futures_as_completed_pipes_closed_early(self):
+        from plumbum.cmd import echo, sh
+        from plumbum.commands import Future
+
+        # closes its pipes, but keeps running; that mustn't hold up the others
+        lingering = sh["-c", "exec >&- 2>&-; sleep 3"] & BG
+        quick = echo["hi"] & BG
+        completed = Future.as_completed([lingering, quick])
+        assert next(completed) is quick
+        assert quick.stdout == "hi\n"
+        assert list(completed) == [lingering]
+        assert lingering.returncode == 0
+
+    @skip_on_windows
+    def test_exit_code_modifiers_keep_redirections(self, tmp_path, capfd):
+        from plumbum.cmd import echo
+
+        assert (echo["hello"] > str(tmp_path / "out.txt")) & TF
+        assert (echo["there"] >> str(tmp_path / "out.txt")) & RETCODE == 0
+        assert (tmp_path / "out.txt").read_text() == "hello\nthere\n"
+        assert echo["quiet"] & TF
+        assert capfd.readouterr().out == ""
+
+    @skip_on_windows
+    def test_redirection_keeps_explicit_devnull(self, tmp_path):
+        from plumbum.cmd import cat, echo
+        from plumbum.commands.base import RedirectionError
+
+        with pytest.raises(RedirectionError):
+            (echo["hello"] > str(tmp_path / "out.txt")).popen(stdout=subprocess.DEVNULL)
+        with pytest.raises(RedirectionError):
+            (cat < str(tmp_path / "out.txt")).popen(stdin=subprocess.DEVNULL)
+        with pytest.raises(RedirectionError):
+            (cat << "data").popen(stdin=subprocess.DEVNULL)
+        assert ((cat << "data") | cat)() == "data"
+
     @skip_on_windows
     def test_tee_modifier(self, capfd):
         from plumbum.cmd import echo
@@ -647,6 +751,34 @@ class TestLocalMachine:
             assert result[1] == EXPECT
             assert capfd.readouterr()[0] == EXPECT
 
+    @skip_on_windows
+    def test_tee_split_and_invalid_utf8(self, capfd):
+        from plumbum.cmd import sh
+
+        result = sh["-c", "printf '\\303'; sleep 0.2; printf '\\251\\377\\n'"] & TEE
+        assert result == (0, "\u00e9\n", "")
+        assert capfd.readouterr()[0] == "\u00e9\n"
+
+    @skip_on_windows
+    def test_tee_stdout_closed_early(self, capfd, monkeypatch):
+        import plumbum.commands.modifiers
+        from plumbum.cmd import sh
+
+        calls = []
+        select = plumbum.commands.modifiers.select
+
+        def counting_select(*args):
+            calls.append(args)
+            return select(*args)
+
+        monkeypatch.setattr(plumbum.commands.modifiers, "select", counting_select)
+        result = sh["-c", "exec >&-; sleep 0.5; echo done >&2"] & TEE
+        assert result == (0, "", "done\n")
+        assert capfd.readouterr()[1] == "done\n"
+        # waiting on stderr must not spin on the closed stdout: one wakeup per event
+        # (stdout's EOF, stderr's data and EOF), not thousands
+        assert len(calls) < 10
+
     @skip_on_windows
     @pytest.mark.parametrize(
         ("modifier", "expected"),
@@ -666,6 +798,43 @@ class TestLocalMachine:
         assert cmd & modifier == expected
         assert capfd.readouterr() == ("meow", "")
 
+    @skip_on_windows
+    def test_redirection_stdin_large_data(self):
+        from plumbum.cmd import cat
+
+        data = "0123456789abcdef\n" * 100000
+        assert (cat << data)() == data
+
+    def test_redirection_stdin_large_data_without_memfd(self, monkeypatch):
+        import threading
+
+        from plumbum.cmd import cat
+
+        # input that doesn't fit in a pipe goes through a temporary file then; it's all
+        # in place before the command starts, with no thread left to feed it
+        monkeypatch.delattr(os, "memfd_create", raising=False)
+        data = "0123456789abcdef\n" * 100000
+        threads = threading.active_count()
+        proc = (cat << data).popen()
+        assert threading.active_count() == threads
+        assert proc.communicate()[0] == data.encode()
+
+    @skip_on_windows
+    def test_redirection_stdin_buffers(self):
+        from plumbum.cmd import cat
+
+        data = bytearray(b"0123456789abcdef\n" * 100000)
+        assert (cat << b"abc")() == "abc"
+        assert (cat << memoryview(b"view"))() == "view"
+        with ((cat << data) > os.devnull).bgrun() as p:
+            data.clear()
+        assert p.returncode == 0
+
+    @skip_on_windows
+    def test_redirection_stdin_text_without_encoding(self):
+        cat = LocalCommand(local.which("cat"), None)
+        assert (cat << "h\u00e9llo")() == "h\u00e9llo"
+
     @skip_on_windows
     def test_logger_pipe(self):
         from plumbum.cmd import bash
@@ -731,6 +900,44 @@ class TestLocalMachine:
         out = sh.run("echo $FOO")[1]
         assert out.splitlines() == ["17"]
 
+    @skip_on_windows
+    @pytest.mark.timeout(10)
+    def test_session_large_stderr(self, tmp_path):
+        script = tmp_path / "noisy.py"
+        script.write_text('import sys\nsys.stderr.write("x\\n" * 100000)\nprint(1)\n')
+        sh = local.session()
+        rc, out, err = sh.run(f"{sys.executable} {script}")
+        assert rc == 0
+        assert out == "1\n"
+        assert len(err) == 200000
+
+    @skip_on_windows
+    @pytest.mark.timeout(10)
+    def test_session_large_input(self):
+        from plumbum.machines.session import ShellSession
+
+        # dash reads its stdin in blocks, and could swallow the input meant for head
+        sh = ShellSession(local["bash"].popen())
+        data = b"x" * 300000 + b"\n"
+        proc = sh.popen(f"head -c {len(data)}")
+        out, _ = proc.communicate(data)
+        assert proc.returncode == 0
+        assert out == data
+        assert sh.run("echo ok")[1] == "ok\n"
+
+    @skip_on_windows
+    @pytest.mark.timeout(10)
+    def test_session_readline_then_communicate(self):
+        sh = local.session()
+        proc = sh.popen("printf 'a\\nb\\nc\\n'")
+        # let the whole output, end marker included, reach the pipe, so that the
+        # readline() below pulls all of it into the buffer
+        time.sleep(0.5)
+        assert proc.stdout.readline() == b"a\n"
+        assert proc.communicate() == (b"b\nc\n", b"")
+        assert proc.returncode == 0
+        assert sh.run("echo ok")[1] == "ok\n"
+
     def test_quoting(self):
         ssh = local["ssh"]
         pwd = local["pwd"]
@@ -758,6 +965,25 @@ class TestLocalMachine:
             local.cmd.ls("no-file")
         assert pickle.loads(pickle.dumps(exc_info.value)).argv == exc_info.value.argv
 
+    def test_exception_str(self):
+        err = ProcessExecutionError(["ls", "x y"], 2, "out\nput", b"err")
+        text = str(err)
+        assert text == (
+            "Unexpected exit code: 2\n"
+            "Command line: | ls 'x y'\n"
+            "Stdout:       | out\n"
+            "              | put\n"
+            "Stderr:       | b'err'"
+        )
+        assert str(err) is text
+        err.host = "remote"
+        assert "Host:         | remote" in str(err)
+        err.argv.append("zzz")
+        assert "Command line: | ls 'x y' zzz\n" in str(err)
+        # the cached message isn't pickled along
+        assert "_formatted" not in pickle.loads(pickle.dumps(err)).__dict__
+        assert str(pickle.loads(pickle.dumps(err))) == str(err)
+
     def test_tempdir(self):
         with local.tempdir() as dir:
             assert dir.is_dir()
@@ -859,6 +1085,42 @@ class TestLocalMachine:
             os.waitpid(proc.pid, 0)
         proc.wait()
 
+    @pytest.mark.skipif(not hasattr(os, "pidfd_open"), reason="needs pidfd_open")
+    @pytest.mark.timeout(20)
+    def test_local_daemon_wait_without_polling(self, monkeypatch):
+        from plumbum.cmd import sleep
+        from plumbum.commands.daemons import _DaemonPopen
+
+        proc = local.daemonic_popen(sleep[0.1])
+        assert proc._pidfd is not None
+
+        timeouts = []
+        exited = _DaemonPopen._exited
+
+        def spy(self, timeout):
+            timeouts.append(timeout)
+            return exited(self, timeout)
+
+        monkeypatch.setattr(_DaemonPopen, "_exited", spy)
+        assert proc.wait() == 0
+        assert proc.poll() == 0
+        # a single blocking wait on the pidfd, rather than a polling loop
+        assert timeouts == [None]
+
+    @skip_on_windows
+    @pytest.mark.timeout(20)
+    def test_local_daemon_wait_timeout(self):
+        from plumbum.cmd import sleep
+
+        proc = local.daemonic_popen(sleep[5])
+        assert isinstance(proc, subprocess.Popen)
+        with pytest.raises(subprocess.TimeoutExpired):
+            proc.wait(timeout=0.1)
+        with pytest.raises(subprocess.TimeoutExpired):
+            proc.wait(timeout=-1)
+        proc.terminate()
+        assert proc.wait() == 0
+
     @skip_on_windows
     def test_atomic_file(self):
         af1 = AtomicFile("tmp.txt")
@@ -972,6 +1234,61 @@ for _ in range({num_of_increments}):
         c = ls["-l", ["-a", "*.py"]]
         assert c.formulate()[1:] == ["-l", "-a", "*.py"]
 
+    def test_formulate_is_repeatable(self):
+        from plumbum.cmd import ls
+
+        c = ls["-l", "a b"]
+        argv = c.formulate(1)
+        argv.append("junk")
+        assert c.formulate(1)[1:] == ["-l", "'a b'"]
+        assert c.formulate()[1:] == ["-l", "a b"]
+        assert c.formulate(0, ["x"])[1:] == ["-l", "a b", "x"]
+
+        c = ls[local.path("/"), 5, None]["-a"]
+        assert [type(a) for a in c.args] == [str, str, type(None), str]
+        assert c.formulate()[1:] == ["/", "5", "-a"]
+
+        p = ls["-a"]["b c"] | ls
+        assert p._formulate_cache is not None
+        argv = p.formulate(1)
+        argv.clear()
+        assert p.formulate(1)[1:] == ["-a", "'b c'", "|", p.dstcmd.formulate(1)[0]]
+        assert (ls[ls["-a"]] | ls)._formulate_cache is None
+
+        r = ls["-a"] > "out file"
+        assert r._formulate_cache is not None
+        assert r.formulate(1)[1:] == ["-a", ">", "'out file'"]
+        assert r.formulate(1) == r.formulate(1)
+        assert (ls | ls > "out")._formulate_cache is not None
+        assert (ls > sys.stdout)._formulate_cache is None
+
+    def test_command_nodes_have_no_dict(self):
+        from plumbum.cmd import ls
+
+        nodes = [
+            ls,
+            ls["-a"],
+            ls.with_env(FOO="bar"),
+            ls | ls,
+            ls > "out",
+            ls >> "out",
+            ls >= "err",
+            ls < "in",
+            ls << "data",
+        ]
+        for node in nodes:
+            assert not hasattr(node, "__dict__"), type(node).__name__
+
+    @skip_on_windows
+    def test_futures_and_sessions_have_no_dict(self):
+        from plumbum.cmd import true
+
+        future = true & BG
+        future.wait()
+        assert not hasattr(future, "__dict__")
+        with local.session() as sh:
+            assert not hasattr(sh, "__dict__")
+
     def test_contains_ls(self):
         assert "ls" in local
 
@@ -1005,6 +1322,14 @@ for _ in range({num_of_increments}):
             future.stdin.write(b"foobar")
             future.stdin.close()
 
+    def test_pipeline_source_stdin_not_piped(self):
+        from plumbum.cmd import cat, wc
+
+        proc = (cat | wc["-c"]).popen()
+        assert proc.srcproc.stdin is None
+        assert proc.communicate()[0].strip() == b"0"
+        assert ((cat << "abc") | wc["-c"])().strip() == "3"
+
     def test_run_bg(self):
         from plumbum.cmd import ls
 
@@ -1097,3 +1422,28 @@ def test_local_glob_path(tmpdir):
 
     pp = LocalPath(str(p))
     assert len(pp // "*.txt") == 2
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "plain",
+        "-l",
+        "a b",
+        "it's",
+        '"`$\\',
+        "*.py",
+        "ünïcode",
+        42,
+        LocalPath("/tmp"),
+    ],
+)
+def test_shquote_matches_shlex(text):
+    import shlex
+
+    from plumbum.commands import shquote
+
+    quoted = shquote(text)
+    assert type(quoted) is str
+    assert quoted == shlex.quote(str(text))
@@ -46,6 +46,27 @@ def test_draining_stderr_with_stdout_redirect(tmp_path, generate_cmd, process_cm
     assert len(stdout) == 0
 
 
+@skip_on_windows
+@pytest.mark.timeout(10)
+def test_draining_stderr_with_run(generate_cmd, process_cmd):
+    retcode, stdout, stderr = (generate_cmd | process_cmd | process_cmd).run()
+    assert retcode == 0
+    assert len(stdout.splitlines()) == 5000
+    assert len(stderr.splitlines()) == 5000
+
+
+@pytest.mark.timeout(10)
+def test_failing_stage_reports_own_stderr():
+    fail = plumbum.local["python"]["-c", "import sys; sys.exit('boom')"]
+    cat = plumbum.local["python"][
+        "-c", "import sys; sys.stdout.write(sys.stdin.read())"
+    ]
+    with pytest.raises(plumbum.ProcessExecutionError) as err:
+        (fail | cat | cat)()
+    assert err.value.argv == fail.formulate()
+    assert err.value.stderr.strip() == "boom"
+
+
 @pytest.fixture()
 def generate_cmd(tmp_path):
     generate = tmp_path / "generate.py"